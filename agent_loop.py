@@ -1,136 +1,343 @@
 from typing import List
 from pydantic_ai.direct import model_request_sync
-from pydantic_ai.messages import ModelRequest, ModelMessage, UserPromptPart, SystemPromptPart
+from pydantic_ai.messages import ModelRequest, ModelMessage, UserPromptPart, SystemPromptPart, ToolCallPart, TextPart, ModelResponse
 from pydantic_ai.models import ModelRequestParameters
-from rich.console import Console
+from pydantic_ai.usage import RunUsage
+from rich.console import Console, Group
 from rich.panel import Panel
 from rich.text import Text
-from rich.markdown import Markdown
-from tools.execute_tool import execute_tool, tools_definitions,icons
+from tools.execute_tool import execute_tool, tools_definitions,icons, READONLY_TOOLS, safe_loads
+from tools._sandbox import is_inside
+from tools.llm_cache import CacheBackend, cache_key, dump_response, load_response
+from tools.semantic_cache import SemanticCache
 from pydantic_ai.models.openai import OpenAIChatModel
 from pydantic_ai.providers.openrouter import OpenRouterProvider
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import atexit
+import functools
+import httpx
 import os
-import json
+import re
+import reprlib
+import tiktoken
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+@functools.cache
+def _system_message() -> ModelRequest:
+    """Read system.txt once and share the same system message across agents."""
+    with open('system.txt', 'r') as f:
+        system_content = f.read().strip()
+
+    # System prompt to guide the agent - use ModelRequest
+    return ModelRequest(
+        parts=[
+            SystemPromptPart(content=system_content)
+        ]
+    )
+
+
+@functools.cache
+def _token_encoding():
+    """Load the tiktoken encoding, or None if it can't be loaded (e.g. offline)."""
+    try:
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception:
+        return None
+
+
+def _estimate_tokens(message: ModelMessage) -> int:
+    """Estimate the tokens a message adds to the context."""
+    text = "".join(
+        part.content if isinstance(getattr(part, 'content', None), str) else str(getattr(part, 'args', '') or '')
+        for part in message.parts
+    )
+    encoding = _token_encoding()
+    if encoding is None:
+        return len(text) // 4  # Rough average of four characters per token
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+# Any of these means a response may contain markdown worth rendering
+_MARKDOWN_RE = re.compile(r"[`*_#>\[\]]|\n\n")
+
+PREVIEW_CHARS = 10
+# Args hidden from previews: bookkeeping, or too large to be worth showing
+HIDDEN_ARG_KEYS = frozenset({"audit_log", "working_directory", "content", "new_string", "old_string"})
+
+
+def _preview(value) -> str:
+    """Short preview of an argument value, without stringifying large values in full."""
+    if isinstance(value, (str, bytes)):
+        return f"{value[:PREVIEW_CHARS]}..." if len(value) > PREVIEW_CHARS else str(value)
+    return reprlib.repr(value)
+
+
+def _coerce_args(args) -> dict:
+    """Tool call args as a dict, parsing them if they arrived as a JSON string."""
+    if isinstance(args, dict):
+        return args
+    if isinstance(args, (str, bytes)):
+        parsed = safe_loads(args)
+        return parsed if isinstance(parsed, dict) else {}
+    return {}
+
+
+def _write_target(args, working_directory: str) -> str | None:
+    """Real path a write call targets, or None if its args don't name one."""
+    parsed = _coerce_args(args)
+    path, directory = parsed.get("path"), parsed.get("directory") or "./"
+    if not isinstance(path, str) or not isinstance(directory, str):
+        return None
+    return os.path.realpath(os.path.join(working_directory, directory, path))
+
+
+def _format_args_preview(args: dict) -> str:
+    return ", ".join(f"{k}={_preview(v)}" for k, v in args.items() if k not in HIDDEN_ARG_KEYS)
 
 
 class AgentLoop:
     """Simple agentic loop with conversation history and tool calling."""
 
-    def __init__(self, model_name: str = 'openai/gpt-4.1-mini', working_directory: str = '.'):
+    def __init__(self, model_name: str = 'openai/gpt-4.1-mini', working_directory: str = '.', cache: CacheBackend | None = None,
+                 track_usage: bool = False, enable_trimming: bool = True, semantic_cache: SemanticCache | None = None,
+                 quiet: bool | None = None):
         if OPENROUTER_API_KEY is None:
             raise ValueError("OPENROUTER_API_KEY environment variable is required")
+        # One pooled HTTP/2 client for the whole session so every iteration
+        # reuses the same TLS connection instead of handshaking again
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=20, keepalive_expiry=60),
+            http2=True,
+            timeout=httpx.Timeout(600, connect=5),
+        )
+        atexit.register(self.close)
         self.model = OpenAIChatModel(
                 model_name,
-                provider=OpenRouterProvider(api_key=OPENROUTER_API_KEY),
+                provider=OpenRouterProvider(api_key=OPENROUTER_API_KEY, http_client=self._http),
             )
         self.working_directory = working_directory
-        self.context: List[ModelMessage] = []
         self.max_iterations = 20 # Prevent infinite loops
-        self.console = Console()  # Rich console for formatted output
-        
-        with open('system.txt', 'r') as f:
-            system_content = f.read().strip()
-
-        # System prompt to guide the agent - use ModelRequest
-        system_message = ModelRequest(
-            parts=[
-                SystemPromptPart(content=system_content)
-            ]
+        self.max_context_messages = 200 # Oldest turns are dropped beyond this
+        self.max_context_tokens = 100_000 # ...or beyond this many estimated tokens
+        self.enable_trimming = enable_trimming
+        self.track_usage = track_usage
+        self.usage = RunUsage()  # Token usage across all requests, when track_usage is on
+        if quiet is None:
+            quiet = os.environ.get("AGENT_QUIET") == "1"
+        self.console = Console(quiet=quiet)  # Rich console for formatted output
+        # Quiet runs (CI, benchmarks) skip building panels entirely
+        self.display_enabled = not quiet
+        # Piped or captured output still gets every panel, but as plain text without markdown
+        self.render_markdown = self.console.is_terminal
+        # Exact-match response cache; no temperature is set so responses are replayable
+        # Off unless given: within one loop the context only grows, so a private cache never hits
+        self.cache = cache
+        # Opt-in, since it loads an embedding model; only side-effect-free turns are stored
+        self.semantic_cache = semantic_cache
+        self._tool_names = [tool.name for tool in tools_definitions]
+        # Identical for every request, so build it once
+        self._req_params = ModelRequestParameters(
+            function_tools=tools_definitions,
+            allow_text_output=True,
         )
+        self._executor = ThreadPoolExecutor(max_workers=8)  # Parallel read-only and write tool calls
         
-        # Add system message to context
-        self.context.append(system_message)
+        # Static prefix (system message) is never mutated so the provider's
+        # prompt cache keeps hitting; new messages are only appended to the tail
+        self._static_prefix: List[ModelMessage] = [_system_message()]
+        self._tail: List[ModelMessage] = []
+        self._tail_tokens: List[int] = []  # Estimated tokens per tail message
+
+        self._warm_up()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _event_loop(self):
+        """Return the loop model_request_sync runs on, so the pool is shared with it."""
+        try:
+            return asyncio.get_event_loop()
+        except RuntimeError:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            return loop
+
+    def _warm_up(self):
+        """Open the connection to OpenRouter before the first model request."""
+        try:
+            self._event_loop().run_until_complete(self._http.head(OPENROUTER_BASE_URL))
+        except httpx.HTTPError:
+            pass  # Best effort - the first real request will connect instead
+
+    def close(self):
+        """Close the pooled HTTP client and the tool executor."""
+        # Drop the exit hook's reference so a closed loop can be garbage collected
+        atexit.unregister(self.close)
+        self._executor.shutdown(wait=False)
+        if not self._http.is_closed:
+            self._event_loop().run_until_complete(self._http.aclose())
+
+    @property
+    def context(self) -> List[ModelMessage]:
+        """Full conversation sent to the model: static prefix followed by the tail."""
+        return self._static_prefix + self._tail
 
-    def _display_tool_call(self, part, tool_return_part):
-        """Display tool call info in a rich panel."""
-        tool_name = getattr(part, 'tool_name', None)
-        args = getattr(part, 'args', None)
+    def _append(self, message: ModelMessage):
+        """Append a message to the tail, recording its estimated token count."""
+        self._tail.append(message)
+        self._tail_tokens.append(_estimate_tokens(message))
+
+    def _context_too_long(self, start: int = 0) -> bool:
+        return (len(self._tail) - start > self.max_context_messages
+                or sum(self._tail_tokens[start:]) > self.max_context_tokens)
+
+    def _trim_context(self):
+        """Drop the oldest complete turns from the tail, keeping the latest turn intact."""
+        # A turn starts at each user prompt, so cutting there never splits a tool call from its result
+        turn_starts = [i for i, message in enumerate(self._tail)
+                       if isinstance(message, ModelRequest)
+                       and any(isinstance(p, UserPromptPart) for p in message.parts)]
+        for start in turn_starts[1:]:
+            if not self._context_too_long(start) or start == turn_starts[-1]:
+                del self._tail[:start]
+                del self._tail_tokens[:start]
+                return
+
+    def _cached_model_request(self, context: List[ModelMessage]):
+        """Request a model response, replaying identical requests from the cache when one is set."""
+        if self.cache is None:
+            return model_request_sync(self.model, context, model_request_parameters=self._req_params)
+
+        key = cache_key(self.model.model_name, context, self._tool_names)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return load_response(cached)
+
+        model_response = model_request_sync(
+            self.model,
+            context,
+            model_request_parameters=self._req_params,
+        )
+
+        # Never cache side-effect tool calls so a replay can't skip state changes
+        tool_names = [part.tool_name for part in model_response.parts if isinstance(part, ToolCallPart)]
+        if all(name in READONLY_TOOLS for name in tool_names):
+            self.cache.set(key, dump_response(model_response))
+        return model_response
+
+    def _execute_tool_calls(self, tool_parts) -> list:
+        """Execute tool calls in order, running each run of consecutive read-only calls in parallel.
+
+        Consecutive writes to distinct files also run in parallel, so their fsyncs overlap.
+        """
+        tool_return_parts = [None] * len(tool_parts)
+        batch = []
+        write_targets = set()  # Files written by the current batch; empty for a read-only batch
+
+        def run_batch():
+            results = self._executor.map(
+                lambda i: execute_tool(tool_parts[i], self.working_directory), batch)
+            for i, tool_return_part in zip(batch, results):
+                tool_return_parts[i] = tool_return_part
+            batch.clear()
+            write_targets.clear()
+
+        for i, part in enumerate(tool_parts):
+            if part.tool_name in READONLY_TOOLS:
+                if write_targets:
+                    run_batch()
+                batch.append(i)
+            elif part.tool_name == "write" and (target := _write_target(part.args, self.working_directory)):
+                # Reads must not overlap writes, and writes to one file, or to a path and one
+                # beneath it (which can't both succeed), must keep their order
+                if (batch and not write_targets) or any(
+                        is_inside(target, other) or is_inside(other, target) for other in write_targets):
+                    run_batch()
+                batch.append(i)
+                write_targets.add(target)
+            else:
+                # Side-effect tools run alone so earlier reads and later reads see the right state
+                run_batch()
+                tool_return_parts[i] = execute_tool(part, self.working_directory)
+        run_batch()
+        return tool_return_parts
+
+    def _tool_call_panel(self, part, tool_return_part) -> Panel:
+        """Build a rich panel showing tool call info."""
+        tool_name = part.tool_name
+        args = part.args
         content = Text()
         
-        # Parse tool result from ToolReturnPart content
-        try:
-            tool_result = json.loads(tool_return_part.content)
-        except (json.JSONDecodeError, TypeError):
-            tool_result = {"result": tool_return_part.content}
+        # Tools report failures as text starting with "Error:"
+        tool_output = tool_return_part.content
+        is_error = isinstance(tool_output, str) and tool_output.startswith("Error:")
+
+        # Parse args once for both the preview and the audit log
+        parsed_args = _coerce_args(args)
 
         # Show args preview for all tools
-        if args:
-            try:
-                # Parse args if it's a string
-                if isinstance(args, str):
-                    parsed_args = json.loads(args)
-                elif isinstance(args, dict):
-                    parsed_args = args
-                else:
-                    parsed_args = {}
-
-                # Show preview of args (excluding audit_log and working_directory)
-                args_preview = {k:v for k, v in parsed_args.items()
-                                if k not in ['audit_log', 'working_directory']}
-
-                if args_preview:
-                    content.append(f"Args: {args_preview}\n", style="dim cyan")
-            except (json.JSONDecodeError, TypeError):
-                pass
+        args_preview = _format_args_preview(parsed_args)
+        if args_preview:
+            content.append(f"Args: {args_preview}\n", style="dim cyan")
         # Show result with success/error indicator
-        if isinstance(tool_result, dict) and 'error' in tool_result:
+        if is_error:
             content.append("❌ ", style="red")
-            content.append(tool_result['error'], style="red")
+            content.append(tool_output, style="red")
             border_style = "red"
-        elif isinstance(tool_result, dict) and 'output' in tool_result:
-            content.append("✅ ", style="green")
-            output = tool_result['output']
-            if output.strip():
-                content.append(output, style="green")
-            else:
-                content.append("Command completed (no output)", style="green")
-            border_style = "blue"
         else:
-            audit_log_text = "Tool executed"
-            if args:
-                try:
-                    # Parse args if it's a string
-                    if isinstance(args, str):
-                        parsed_args = json.loads(args)
-                    elif isinstance(args, dict):
-                        parsed_args = args
-                    else:
-                        parsed_args = {}
-                    
-                    if 'audit_log' in parsed_args:
-                        audit_log_text = parsed_args['audit_log']
-                except (json.JSONDecodeError, TypeError):
-                    pass
-            
+            audit_log_text = parsed_args.get('audit_log', "Tool executed")
             content.append(audit_log_text, style="magenta")
             border_style = "blue"
         # Icon selection based on tool type
-        panel = Panel(
+        return Panel(
             content,
             title=f"{icons.get(tool_name, '🔧')} {tool_name.title() if tool_name else ''}",
             title_align="left",
             border_style=border_style,
             padding=(0, 1)
         )
-        self.console.print(panel)
     
-    def _display_response(self, part):
-        """Display response text in a rich panel with markdown formatting."""
-        text_content = getattr(part, 'content', str(part))
-        markdown = Markdown(text_content)
-        response_panel = Panel(
-            markdown,
+    def _response_panel(self, part) -> Panel:
+        """Build a rich panel showing response text with markdown formatting."""
+        text_content = part.content
+        if self.render_markdown and _MARKDOWN_RE.search(text_content):
+            from rich.markdown import Markdown  # Imported on first use - it's slow to load
+            body = Markdown(text_content)
+        else:
+            # Plain replies, and output that isn't a terminal, don't need a full markdown parse
+            body = Text(text_content)
+        return Panel(
+            body,
             title="💬 Response",
             title_align="left",
             border_style="green",
             padding=(0, 1)
         )
-        self.console.print(response_panel)
+
+    def _display_model_response(self, model_response, tool_return_parts):
+        """Display all parts of a model response with a single print."""
+        if not self.display_enabled:
+            return
+        tool_returns = iter(tool_return_parts)
+        panels = []
+        for part in model_response.parts:
+            if isinstance(part, ToolCallPart):
+                panels.append(self._tool_call_panel(part, next(tool_returns)))
+            elif isinstance(part, TextPart):
+                panels.append(self._response_panel(part))
+        self.console.print(Group(*panels))
     
     def _display_error(self, error_message):
         """Display error message in a rich panel."""
+        if not self.display_enabled:
+            return
         error_panel = Panel(
             Text(error_message, style="bold red"),
             title="❌ Error",
@@ -142,6 +349,8 @@ class AgentLoop:
     
     def _display_user_input(self, user_input):
         """Display user input in a rich panel."""
+        if not self.display_enabled:
+            return
         user_panel = Panel(
             Text(user_input, style="white"),
             title="👤 You",
@@ -158,52 +367,53 @@ class AgentLoop:
         
         # Add user input to context as ModelRequest
         user_message = ModelRequest(parts=[UserPromptPart(content=user_input)])
-        self.context.append(user_message)
-        
+        self._append(user_message)
+
+        # Near-duplicate of an earlier side-effect-free turn - reuse its answer
+        if self.semantic_cache is not None:
+            cached_text = self.semantic_cache.lookup(user_input)
+            if cached_text is not None:
+                model_response = ModelResponse(parts=[TextPart(content=cached_text)])
+                self._append(model_response)
+                self._display_model_response(model_response, [])
+                return "Completed"
+
+        has_side_effects = False
         for _ in range(self.max_iterations):
+            # Trim before sending rather than waiting for the API to reject the request
+            if self.enable_trimming and self._context_too_long():
+                self._trim_context()
+
             # Make request to model with current context
             try:
-                model_response = model_request_sync(
-                    self.model,
-                    self.context,
-                    model_request_parameters=ModelRequestParameters(
-                        function_tools=tools_definitions,
-                        allow_text_output=True,
-                    ),
-                )
+                model_response = self._cached_model_request(self.context)
                 
+                if self.track_usage:
+                    self.usage.requests += 1
+                    self.usage.incr(model_response.usage)
+
                 # Add model response to context
-                self.context.append(model_response)
-                
-                # Process response parts
-                has_tool_calls = False
-                tool_return_parts = []
+                self._append(model_response)
                 
-                for part in model_response.parts:
-                    if hasattr(part, 'tool_name') and part.tool_name:
-                        has_tool_calls = True
-                        
-                        # Execute tool - now returns ToolReturnPart directly
-                        tool_return_part = execute_tool(part, self.working_directory)
-                        
-                        # Display tool call info
-                        self._display_tool_call(part, tool_return_part)
-                        
-                        # Append tool return part for next iteration
-                        tool_return_parts.append(tool_return_part)
-
-                    else:
-                        # Display response
-                        self._display_response(part)
+                # Execute tools - consecutive read-only calls run in parallel
+                tool_parts = [part for part in model_response.parts
+                              if isinstance(part, ToolCallPart)]
+                has_tool_calls = bool(tool_parts)
+                has_side_effects = has_side_effects or any(part.tool_name not in READONLY_TOOLS for part in tool_parts)
+                tool_return_parts = self._execute_tool_calls(tool_parts)
+                self._display_model_response(model_response, tool_return_parts)
                 
                 # If there were tool calls, add tool results and continue loop
                 if has_tool_calls and tool_return_parts:
                     # Create a ModelRequest with tool return parts
                     tool_message = ModelRequest(parts=tool_return_parts)
-                    self.context.append(tool_message)
+                    self._append(tool_message)
                     continue  # Continue the loop for model to process tool results
                 
                 # If no tool calls, we have the final response
+                if self.semantic_cache is not None and not has_side_effects:
+                    final_text = "".join(part.content for part in model_response.parts if isinstance(part, TextPart))
+                    self.semantic_cache.store(user_input, final_text)
                 return "Completed"
                 
             except Exception as e:
@@ -0,0 +1,65 @@
+import pytest
+
+import tools.grep as grep_module
+from tools.grep import grep
+
+PATTERNS = [
+    "foo",
+    "a{,2}x",
+    r"x\sy",
+    r"\bbar\b",
+    "foo(?!\\s)",
+    "[a-z]+_[0-9]{2,}",
+    r"\.py$",
+    "(?:ab|cd)+e",
+    "ſtop",
+]
+
+FILES = {
+    "a.txt": "x\x1cy\naax\nfoo\n",
+    "b.py": "bar baz\nsnake_42\nname.py\n",
+    "c.txt": "cdabe\nSTOP\nstop\n",
+    "d.txt": "nothing here\n",
+}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name, content in FILES.items():
+        (tmp_path / name).write_text(content)
+    return str(tmp_path)
+
+
+def _grep_all(tree, pattern, **kwargs):
+    return [grep(tree, pattern, "Regression check", mode=mode, line_number=True, **kwargs)
+            for mode in ("files_with_matches", "content", "count")]
+
+
+@pytest.mark.parametrize("ignore_case", [False, True])
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_prefilter_matches_plain_re(tree, pattern, ignore_case, monkeypatch):
+    pytest.importorskip("hyperscan")
+    grep_module._compile_prefilter.cache_clear()
+    with_prefilter = _grep_all(tree, pattern, ignore_case=ignore_case)
+
+    monkeypatch.setattr(grep_module, "hyperscan", None)
+    grep_module._compile_prefilter.cache_clear()
+    without_prefilter = _grep_all(tree, pattern, ignore_case=ignore_case)
+
+    assert with_prefilter == without_prefilter
+
+
+def test_grep_recovers_from_broken_pool(tmp_path):
+    for i in range(grep_module.PARALLEL_MIN_FILES):
+        (tmp_path / f"{i:03d}.txt").write_text("needle\n" if i % 2 else "hay\n")
+
+    # A worker killed from outside (e.g. by the OOM killer) breaks the whole pool
+    pool = grep_module._process_pool()
+    list(pool.map(abs, range(len(pool._processes) or 1)))
+    for process in list(pool._processes.values()):
+        process.kill()
+        process.join()
+
+    result = grep(str(tmp_path), "needle", "Regression check")
+    assert len(result.splitlines()) == grep_module.PARALLEL_MIN_FILES // 2
+    assert grep_module._process_pool() is not pool
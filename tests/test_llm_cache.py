@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from pydantic_ai.messages import ModelRequest, ModelResponse, ToolCallPart, UserPromptPart
+from pydantic_ai.usage import RequestUsage
+
+from tools.llm_cache import cache_key
+
+
+def _conversation(prompt_time, usage, args):
+    return [
+        ModelRequest(parts=[UserPromptPart(content="hello", timestamp=prompt_time)]),
+        ModelResponse(parts=[ToolCallPart(tool_name="write", args=args, tool_call_id="call_1")],
+                      usage=usage, timestamp=prompt_time),
+    ]
+
+
+def test_metadata_does_not_change_key():
+    first = _conversation(datetime(2024, 1, 1, tzinfo=timezone.utc), RequestUsage(input_tokens=1), {"path": "a"})
+    second = _conversation(datetime(2025, 6, 1, tzinfo=timezone.utc), RequestUsage(input_tokens=9), {"path": "a"})
+    assert cache_key("m", first, ["write"]) == cache_key("m", second, ["write"])
+
+
+def test_tool_args_named_like_metadata_change_key():
+    now = datetime.now(timezone.utc)
+    first = _conversation(now, RequestUsage(), {"path": "a", "timestamp": "2024-01-01"})
+    second = _conversation(now, RequestUsage(), {"path": "a", "timestamp": "2025-06-01"})
+    assert cache_key("m", first, ["write"]) != cache_key("m", second, ["write"])
@@ -0,0 +1,72 @@
+import contextlib
+import mmap
+import os
+import stat
+from typing import Iterator
+
+# Most buffers a single writev call accepts
+IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+
+
+@contextlib.contextmanager
+def mapped_text(path: str) -> Iterator[bytes | mmap.mmap]:
+    """Map a file read-only for searching its encoded bytes without decoding it.
+
+    Files containing carriage returns are copied with newlines normalized, as text-mode
+    open() would, so searches behave the same as on the decoded text.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap cannot map an empty file
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b"\r") < 0:
+                yield mm
+            else:
+                yield mm[:].replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+
+def atomic_write(path: str, chunks: list, overwrite: bool = True) -> None:
+    """Write byte chunks to a temporary file beside path, fsync it and rename it into place.
+
+    A crash leaves either the old file or the new one, never a truncated mix. The chunks
+    are written with writev, so callers can pass slices around an edit without joining
+    them. With overwrite=False the file is linked into place and FileExistsError is raised
+    if it already exists.
+    """
+    # Replace the symlink's target, not the link itself
+    path = os.path.realpath(path)
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.urandom(4).hex()}.tmp")
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    except OSError as e:
+        # Report the file the caller asked for, not the temporary name
+        raise type(e)(e.errno, e.strerror, path) from None
+    try:
+        try:
+            if overwrite:
+                with contextlib.suppress(FileNotFoundError):
+                    os.fchmod(fd, stat.S_IMODE(os.stat(path).st_mode))
+            views = [memoryview(chunk) for chunk in chunks if len(chunk)]
+            i = 0
+            while i < len(views):
+                written = os.writev(fd, views[i:i + IOV_MAX])
+                # writev may stop early; skip what was written and resume
+                while i < len(views) and written >= len(views[i]):
+                    written -= len(views[i])
+                    i += 1
+                if written:
+                    views[i] = views[i][written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if overwrite:
+            os.replace(tmp_path, path)
+        else:
+            os.link(tmp_path, path)
+            os.unlink(tmp_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
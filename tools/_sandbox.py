@@ -0,0 +1,27 @@
+import functools
+import os
+
+
+@functools.lru_cache(maxsize=8)
+def abs_working_dir(working_directory: str) -> str:
+    """Absolute form of a working directory, resolved once per distinct directory.
+
+    Relative directories are resolved against the cwd, which the agent never changes.
+    """
+    return os.path.abspath(working_directory)
+
+
+def is_inside(abs_path: str, root: str) -> bool:
+    """Whether normalized absolute abs_path is root or below it.
+
+    Compared per path component, so "/tmp/foo-bar" is not inside "/tmp/foo".
+    """
+    return abs_path == root or abs_path.startswith(root if root.endswith(os.sep) else root + os.sep)
+
+
+def sandbox_path(working_directory: str, path: str) -> str | None:
+    """Resolve path against the working directory, or None if it lands outside it."""
+    root = abs_working_dir(working_directory)
+    # Joining onto the absolute root means abspath only normalizes, with no getcwd
+    abs_path = os.path.abspath(os.path.join(root, path))
+    return abs_path if is_inside(abs_path, root) else None
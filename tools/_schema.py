@@ -0,0 +1,26 @@
+import functools
+import re
+from pydantic import BaseModel
+
+
+@functools.cache
+def tool_schema(params: type[BaseModel]) -> dict:
+    """Return the JSON schema for a tool's params model, generating it once per class."""
+    return params.model_json_schema()
+
+
+# Keep in step with the "(max 10 words)" wording in every tool's audit_log description
+AUDIT_LOG_MAX_WORDS = 10
+_WORD = re.compile(r"\S+")
+
+
+def check_audit_log(v: str) -> str:
+    """Validate an audit_log value, counting words only up to the limit."""
+    words = 0
+    for _ in _WORD.finditer(v):
+        words += 1
+        if words > AUDIT_LOG_MAX_WORDS:
+            raise ValueError(f'Audit log must be maximum {AUDIT_LOG_MAX_WORDS} words, got more than {AUDIT_LOG_MAX_WORDS}')
+    if not words:
+        raise ValueError('Audit log cannot be empty')
+    return v
@@ -0,0 +1,116 @@
+import os
+import sys
+import warnings
+
+try:
+    import liburing
+except ImportError:  # Optional: batched reads are only available on Linux with liburing
+    liburing = None
+
+# Reads submitted per io_uring_enter call
+URING_BATCH = 128
+
+# The liburing binding renamed its classes and dropped the explicit read length
+# (io_uring/io_uring_cqe -> Ring/Cqe); both generations are supported
+if liburing is not None and hasattr(liburing, "Ring"):
+    _Ring, _Cqe = liburing.Ring, liburing.Cqe
+
+    def _prep_read(sqe, fd, buf):
+        liburing.io_uring_prep_read(sqe, fd, buf, 0)
+
+    def _cqe_seen(ring, cqe):
+        liburing.io_uring_cqe_seen(ring, cqe[0])
+elif liburing is not None and hasattr(liburing, "io_uring"):
+    _Ring, _Cqe = liburing.io_uring, liburing.io_uring_cqe
+
+    def _prep_read(sqe, fd, buf):
+        liburing.io_uring_prep_read(sqe, fd, buf, len(buf), 0)
+
+    def _cqe_seen(ring, cqe):
+        liburing.io_uring_cqe_seen(ring, cqe)
+else:
+    _Ring = None
+    if liburing is not None:
+        warnings.warn("unsupported liburing binding, io_uring reads disabled", RuntimeWarning, stacklevel=2)
+
+# Cleared after the first failure so a broken ring is not set up on every call
+_uring_enabled = _Ring is not None and sys.platform == "linux"
+
+
+def _read_files_sync(paths: list[str]) -> dict[str, bytes]:
+    contents = {}
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                contents[path] = f.read()
+        except PermissionError:
+            continue
+    return contents
+
+
+def _read_files_uring(paths: list[str]) -> dict[str, bytes]:
+    """Read whole files through io_uring, submitting up to URING_BATCH reads per syscall."""
+    contents = {}
+    ring = _Ring()
+    cqe = _Cqe()
+    liburing.io_uring_queue_init(URING_BATCH, ring)
+    try:
+        for start in range(0, len(paths), URING_BATCH):
+            pending = {}  # user_data -> (path, fd, buffer)
+            try:
+                for i, path in enumerate(paths[start:start + URING_BATCH]):
+                    try:
+                        fd = os.open(path, os.O_RDONLY)
+                    except PermissionError:
+                        continue
+                    # Registered before fstat so the finally below always closes it
+                    pending[i] = (path, fd, None)
+                    size = os.fstat(fd).st_size
+                    if size == 0:
+                        contents[path] = b""
+                        continue
+                    buf = bytearray(size)
+                    pending[i] = (path, fd, buf)
+                    sqe = liburing.io_uring_get_sqe(ring)
+                    _prep_read(sqe, fd, buf)
+                    liburing.io_uring_sqe_set_data64(sqe, i)
+                submitted = sum(1 for _, _, buf in pending.values() if buf is not None)
+                if not submitted:
+                    continue
+
+                liburing.io_uring_submit(ring)
+                for _ in range(submitted):
+                    liburing.io_uring_wait_cqe(ring, cqe)
+                    entry = cqe[0]
+                    res, i = entry.res, entry.user_data
+                    _cqe_seen(ring, cqe)
+                    if res is not None and res >= 0:
+                        path, _, buf = pending[i]
+                        # A file that shrank since fstat gives a short read
+                        contents[path] = buf if res == len(buf) else buf[:res]
+            finally:
+                for _, fd, _ in pending.values():
+                    os.close(fd)
+            # Failed reads (negative res) are retried synchronously
+            failed = [path for path, _, _ in pending.values() if path not in contents]
+            contents.update(_read_files_sync(failed))
+    finally:
+        liburing.io_uring_queue_exit(ring)
+    return contents
+
+
+def read_files(paths: list[str]) -> dict[str, bytes]:
+    """Read many whole files, batching the syscalls through io_uring when it is available.
+
+    Files that cannot be opened for permission reasons are left out of the result.
+    """
+    global _uring_enabled
+    if _uring_enabled and len(paths) > 1:
+        try:
+            return _read_files_uring(paths)
+        except Exception as e:
+            # e.g. io_uring disabled by the kernel or a seccomp policy, or an unsupported
+            # liburing version; the plain reads below still work
+            _uring_enabled = False
+            warnings.warn(f"io_uring reads disabled, falling back to plain reads: {e!r}", RuntimeWarning, stacklevel=2)
+    return _read_files_sync(paths)
@@ -0,0 +1,104 @@
+import os
+import re
+from typing import Iterator
+
+WILDCARD_CHARS = frozenset("*?[{")
+
+# Directories of VCS data, dependencies, caches and build output, pruned from tree walks
+IGNORE_DIRS = frozenset({
+    ".git", "node_modules", "__pycache__", ".venv", "venv", "dist", "build", ".mypy_cache", ".pytest_cache",
+})
+
+
+def _translate_component(part: str) -> str:
+    """Translate one glob path component into a regex fragment."""
+    out = []
+    i = 0
+    while i < len(part):
+        c = part[i]
+        if c == "*":
+            while i + 1 < len(part) and part[i + 1] == "*":
+                i += 1
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = part.find("]", i + 2 if part[i + 1:i + 2] in ("!", "]") else i + 1)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = part[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body + "]")
+                i = end
+        elif c == "{":
+            end = part.find("}", i)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                options = part[i + 1:end].split(",")
+                out.append("(?:" + "|".join(_translate_component(o) for o in options) + ")")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _translate(parts: list[str]) -> re.Pattern:
+    """Translate '/'-separated glob components into a regex over relative paths."""
+    out = []
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == "**":
+            # Zero or more directories, or anything at all when it's the final component
+            out.append(".*" if last else "(?:.*/)?")
+        else:
+            out.append(_translate_component(part) + ("" if last else "/"))
+    return re.compile("".join(out), re.DOTALL)
+
+
+def iter_glob(root: str, pattern: str, include_hidden: bool = True,
+              skip_dirs: frozenset[str] = frozenset()) -> Iterator[os.DirEntry]:
+    """Yield file entries under root matching a glob pattern, using os.scandir.
+
+    DirEntry.is_dir()/is_file() reuse the file type from readdir, so no extra stat is needed
+    per entry. Supports '*', '?', '[...]', '{a,b}' and '**' for any number of directories.
+    Directories named in skip_dirs are not descended into.
+    """
+    parts = [p for p in pattern.replace(os.sep, "/").split("/") if p not in ("", ".")]
+    if ".." in parts:
+        raise ValueError("Glob patterns cannot contain '..'")
+    if not parts:
+        return
+
+    # Start the walk at the longest literal directory prefix
+    literal = []
+    for part in parts[:-1]:
+        if WILDCARD_CHARS.intersection(part):
+            break
+        literal.append(part)
+    base = os.path.join(root, *literal)
+    rest = parts[len(literal):]
+    regex = _translate(rest)
+    # Without '**' every match is exactly len(rest) components deep
+    max_depth = None if "**" in rest else len(rest) - 1
+
+    stack = [(base, "", 0)]
+    while stack:
+        directory, rel_dir, depth = stack.pop()
+        try:
+            it = os.scandir(directory)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        with it:
+            for entry in it:
+                if not include_hidden and entry.name.startswith("."):
+                    continue
+                rel = rel_dir + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if (max_depth is None or depth < max_depth) and entry.name not in skip_dirs:
+                        stack.append((entry.path, rel + "/", depth + 1))
+                elif entry.is_file() and regex.fullmatch(rel):
+                    yield entry
@@ -1,44 +1,114 @@
 import subprocess
 import os
+import shlex
+import signal
+import threading
+import time
+from collections import deque
 from pydantic import BaseModel, Field
 from pydantic_ai.tools import ToolDefinition
+from ._schema import tool_schema
+
+# Commands using any of these need a real shell to interpret them
+SHELL_METACHARS = frozenset("|&;<>*?`$()~{}[]!#\n")
+SHELL_BUILTINS = frozenset({"cd", "export", "source", ".", "alias", "unset", "set", "exit", "eval", "exec", "ulimit", "umask", "read", "type", "wait"})
+
+def _split_command(command: str) -> list[str] | None:
+    """Split a simple command into argv, or return None if it needs /bin/sh."""
+    if any(c in SHELL_METACHARS for c in command):
+        return None
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        return None
+    if not tokens or tokens[0] in SHELL_BUILTINS or "=" in tokens[0]:
+        return None
+    return tokens
+
+# Only the end of long output is kept - it's what the model needs and bounds memory
+MAX_OUTPUT_BYTES = 64 * 1024
+
+def _drain_tail(stream, tail: deque) -> None:
+    """Read a stream to EOF, keeping at least the last MAX_OUTPUT_BYTES in tail."""
+    size = 0
+    with stream:
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            tail.append(chunk)
+            size += len(chunk)
+            while size - len(tail[0]) >= MAX_OUTPUT_BYTES:
+                size -= len(tail.popleft())
+
+# How long to wait for the output reader after killing a process group
+KILL_GRACE_SECONDS = 1
+
+def _kill_group(pgid: int) -> None:
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
 
 def bash(working_directory: str, command: str, audit_log: str, timeout: int = 120, run_in_background: bool = False) -> str:
     try:
         abs_working_dir = os.path.abspath(working_directory)
+
+        # Run simple commands directly to skip forking a shell
+        tokens = _split_command(command)
+        args = command if tokens is None else tokens
         
         if run_in_background:
             # Start process in background
             process = subprocess.Popen(
-                command,
-                shell=True,
+                args,
+                shell=tokens is None,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
                 cwd=abs_working_dir
             )
             return f"Command started in background with PID: {process.pid}"
         else:
-            # Run command synchronously
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=abs_working_dir
+            # Run command synchronously, streaming output into a bounded tail
+            process = subprocess.Popen(
+                args,
+                shell=tokens is None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=abs_working_dir,
+                start_new_session=True
             )
+            tail = deque()
+            reader = threading.Thread(target=_drain_tail, args=(process.stdout, tail), daemon=True)
+            reader.start()
+            deadline = time.monotonic() + timeout
+            try:
+                returncode = process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # Kill the whole process group so children can't hold the pipe open
+                _kill_group(process.pid)
+                process.wait()
+                reader.join(KILL_GRACE_SECONDS)
+                raise
+            
+            # Children left running in the background (e.g. "server &") keep the pipe open,
+            # so waiting for EOF is bounded by what is left of the timeout
+            reader.join(max(deadline - time.monotonic(), 0))
+            killed = reader.is_alive()
+            if killed:
+                _kill_group(process.pid)
+                reader.join(KILL_GRACE_SECONDS)
             
-            output = ""
-            if result.stdout:
-                output += result.stdout
-            if result.stderr:
-                output += result.stderr
+            # Keep raw bytes and decode once
+            data = b"".join(tail)
+            output = data[-MAX_OUTPUT_BYTES:].decode("utf-8", "replace")
+            if len(data) > MAX_OUTPUT_BYTES:
+                output = f"[Output truncated, showing last {MAX_OUTPUT_BYTES // 1024} KB]\n{output}"
+            if killed:
+                output = (f"[Background processes still running after {timeout} seconds were killed; "
+                          f"use run_in_background=True for long-running commands]\n{output}")
             
-            if result.returncode != 0:
-                return f"Command failed with exit code {result.returncode}:\n{output}"
+            if returncode != 0:
+                return f"Command failed with exit code {returncode}:\n{output}"
             
-            return output if output else ""
+            return output
     
     except subprocess.TimeoutExpired:
         return f"Error: Command timed out after {timeout} seconds"
@@ -55,7 +125,7 @@ class BashParams(BaseModel):
         description="The bash command to execute"
     )
     audit_log: str = Field(
-        description="Required: Concise summary of command (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Install project dependencies', 'Run unit tests', 'Build production bundle'"
+        description="Required: Concise summary of command (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Install project dependencies', 'Run unit tests', 'Build production bundle'"
     )
     timeout: int = Field(
         default=120,
@@ -82,8 +152,8 @@ Usage:
 - Avoid using commands like 'find', 'grep', 'cat' - use dedicated tools instead
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the command being executed.
+Provide a clear, concise summary (max 10 words) describing the command being executed.
 Format like a git commit title: action + target + optional context.
 Examples: 'Install npm dependencies', 'Run integration tests', 'Build Docker image'""",
-    parameters_json_schema=BashParams.model_json_schema(),
+    parameters_json_schema=tool_schema(BashParams),
 )
\ No newline at end of file
@@ -1,33 +1,34 @@
-import os
+from ._fileio import atomic_write, mapped_text
 from pydantic import BaseModel, Field, field_validator
 from pydantic_ai.tools import ToolDefinition
+from ._sandbox import sandbox_path
+from ._schema import check_audit_log, tool_schema
 
 def edit(working_directory: str, path: str, search: str, replace: str, audit_log: str, global_replace: bool = False) -> str:
     try:
-        abs_working_dir = os.path.abspath(working_directory)
-        abs_file_path = os.path.abspath(os.path.join(working_directory, path))
-        if not abs_file_path.startswith(abs_working_dir):
+        abs_file_path = sandbox_path(working_directory, path)
+        if abs_file_path is None:
             return f'Error: Cannot edit "{path}" as it is outside the permitted working directory'
         
-        with open(abs_file_path, 'r') as f:
-            content = f.read()
-        
         if search == replace:
             return "Error: search and replace cannot be the same"
         
-        if search not in content:
-            return f"Error: search text not found in {path}"
-        
-        if not global_replace and content.count(search) > 1:
-            return f"Error: search text appears multiple times in {path}. Use global_replace=True to replace all occurrences"
-        
-        if global_replace:
-            new_content = content.replace(search, replace)
-        else:
-            new_content = content.replace(search, replace, 1)
-        
-        with open(abs_file_path, 'w') as f:
-            f.write(new_content)
+        search_bytes = search.encode()
+        replace_bytes = replace.encode()
+        with mapped_text(abs_file_path) as data:
+            # One scan finds the first match and whether there is a second
+            idx = data.find(search_bytes)
+            if idx < 0:
+                return f"Error: search text not found in {path}"
+            
+            if global_replace:
+                atomic_write(abs_file_path, [data[:].replace(search_bytes, replace_bytes)])
+            elif data.find(search_bytes, idx + len(search_bytes)) >= 0:
+                return f"Error: search text appears multiple times in {path}. Use global_replace=True to replace all occurrences"
+            else:
+                # Write the untouched parts straight from the mapping instead of joining a copy
+                with memoryview(data) as view:
+                    atomic_write(abs_file_path, [view[:idx], replace_bytes, view[idx + len(search_bytes):]])
         
         return f"Edited {path}"
     
@@ -50,7 +51,7 @@ class EditParams(BaseModel):
         description="The text to replace it with"
     )
     audit_log: str = Field(
-        description="Required: Concise summary of changes (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Fix null pointer exception', 'Update API endpoint parameters', 'Remove deprecated function calls'"
+        description="Required: Concise summary of changes (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Fix null pointer exception', 'Update API endpoint parameters', 'Remove deprecated function calls'"
     )
     global_replace: bool = Field(
         default=False,
@@ -60,12 +61,7 @@ class EditParams(BaseModel):
     @field_validator('audit_log')
     @classmethod
     def validate_audit_log_length(cls, v: str) -> str:
-        words = len(v.strip().split())
-        if words > 10:
-            raise ValueError(f'Audit log must be maximum 10 words, got {words} words')
-        if not v.strip():
-            raise ValueError('Audit log cannot be empty')
-        return v
+        return check_audit_log(v)
 
 
 edit_tool_definition = ToolDefinition(
@@ -80,8 +76,8 @@ Usage:
 - The edit will fail if search text is not found or is ambiguous
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the change being made.
+Provide a clear, concise summary (max 10 words) describing the change being made.
 Format like a git commit title: action + target + optional context.
 Examples: 'Fix SQL injection vulnerability', 'Update deprecated API calls'""",
-    parameters_json_schema=EditParams.model_json_schema(),
+    parameters_json_schema=tool_schema(EditParams),
 )
\ No newline at end of file
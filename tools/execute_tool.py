@@ -8,6 +8,11 @@ from .grep import grep, grep_tool_definition
 from .bash import bash, bash_tool_definition
 from .todo import todo, todo_tool_definition
 from pydantic_ai.messages import ToolReturnPart
+from collections import OrderedDict
+import functools
+import orjson
+import os
+import threading
 
 # List of tool definitions for Pydantic AI
 tools_definitions = [
@@ -33,56 +38,117 @@ icons = {
             'todo': '📝'
         }
 
+def safe_loads(raw):
+    """Parse a JSON object with orjson, returning an empty dict if it isn't one."""
+    try:
+        parsed = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+# Tools that only inspect the filesystem and are safe to run in parallel or replay
+READONLY_TOOLS = frozenset({"read", "ls", "glob", "grep"})
+
+# Results of read calls keyed on their arguments and the file's mtime. Directory tools
+# aren't cached: a directory's mtime doesn't change when nested files or contents do
+CACHED_TOOLS = frozenset({"read"})
+RESULT_CACHE_SIZE = 512
+_result_cache: OrderedDict[tuple, str] = OrderedDict()
+_result_cache_lock = threading.Lock()  # Read-only tools may run in parallel threads
+
+
+def _result_cache_key(function_name, args):
+    """Build a cache key for a read call, or None if the file can't be stat'ed."""
+    try:
+        mtime_ns = os.stat(os.path.join(args["working_directory"], args["path"])).st_mtime_ns
+    except (KeyError, TypeError, OSError):
+        return None
+    canonical_args = orjson.dumps(args, default=str, option=orjson.OPT_SORT_KEYS)
+    return (function_name, canonical_args, mtime_ns)
+
+
+def _call_tool(function_name, function, args, tool_call_id, cache_key=None):
+    """Run a tool and wrap its result text, or the error it raised, in a ToolReturnPart."""
+    try:
+        # Every tool returns a string, passed through as-is rather than re-encoded
+        content = function(**args)
+    except Exception as e:
+        content = f"Error: Function execution failed: {e!s}"
+    else:
+        if cache_key is not None:
+            with _result_cache_lock:
+                _result_cache[cache_key] = content
+                if len(_result_cache) > RESULT_CACHE_SIZE:
+                    _result_cache.popitem(last=False)
+    return ToolReturnPart(tool_name=function_name, content=content, tool_call_id=tool_call_id)
+
+
+def _call_cached_tool(function_name, function, args, tool_call_id):
+    """Serve a read call from the result cache, running it on a miss."""
+    cache_key = _result_cache_key(function_name, args)
+    with _result_cache_lock:
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            _result_cache.move_to_end(cache_key)
+    if cached is not None:
+        return ToolReturnPart(tool_name=function_name, content=cached, tool_call_id=tool_call_id)
+    return _call_tool(function_name, function, args, tool_call_id, cache_key)
+
+
+def _call_mutating_tool(function_name, function, args, tool_call_id):
+    """Run a tool that may change files, dropping every cached read-only result first."""
+    with _result_cache_lock:
+        _result_cache.clear()
+    return _call_tool(function_name, function, args, tool_call_id)
+
+
+# Tool name to implementation, built once at import
+_TOOL_FUNCTIONS = {
+    "read": read,
+    "write": write,
+    "ls": ls,
+    "edit": edit,
+    "multiedit": multiedit,
+    "glob": glob,
+    "grep": grep,
+    "bash": bash,
+    "todo": todo,
+}
+
+# Tool name to a caller with its name, implementation and caching policy pre-bound
+def _caller_for(name):
+    if name in CACHED_TOOLS:
+        return _call_cached_tool
+    return _call_tool if name in READONLY_TOOLS else _call_mutating_tool
+
+
+_DISPATCH = {
+    name: functools.partial(_caller_for(name), name, function)
+    for name, function in _TOOL_FUNCTIONS.items()
+}
+
 
 def execute_tool(function_call_part, working_directory, verbose=False):
     """Execute a function call and return a ToolReturnPart."""
-    function_map = {
-        "read": read,
-        "write": write,
-        "ls": ls,
-        "edit": edit,
-        "multiedit": multiedit,
-        "glob": glob,
-        "grep": grep,
-        "bash": bash,
-        "todo": todo,
-    }
-    
     # Pydantic AI uses tool_name attribute, not name
     function_name = function_call_part.tool_name
-    if function_name not in function_map:
+    dispatch = _DISPATCH.get(function_name)
+    if dispatch is None:
         return ToolReturnPart(
             tool_name=function_name,
             content=f"Unknown function: {function_name}",
-            tool_call_id=getattr(function_call_part, 'tool_call_id', 'default')
+            tool_call_id=function_call_part.tool_call_id
         )
     
-    # Add working_directory to args
-    # Handle both dict and string args from Pydantic AI
-    if isinstance(function_call_part.args, dict):
-        args = dict(function_call_part.args)
-    elif function_call_part.args is None:
-        args = {}
+    # Add working_directory to args in a single dict construction
+    raw_args = function_call_part.args
+    if raw_args is None:
+        args = {"working_directory": working_directory}
+    elif isinstance(raw_args, dict):
+        args = {**raw_args, "working_directory": working_directory}
     else:
-        # If args is a string, try to parse it as JSON
-        import json
-        try:
-            args = json.loads(function_call_part.args)
-        except (json.JSONDecodeError, TypeError):
-            args = {}
-    
-    args["working_directory"] = working_directory
-    
-    try:
-        function_result = function_map[function_name](**args)
-        return ToolReturnPart(
-            tool_name=function_name,
-            content=str({"result": function_result}),
-            tool_call_id=getattr(function_call_part, 'tool_call_id', 'default')
-        )
-    except Exception as e:
-        return ToolReturnPart(
-            tool_name=function_name,
-            content=str({"error": f"Function execution failed: {str(e)}"}),
-            tool_call_id=getattr(function_call_part, 'tool_call_id', 'default')
-        )
\ No newline at end of file
+        # Rare: args still a JSON string
+        args = {**safe_loads(raw_args), "working_directory": working_directory}
+
+    return dispatch(args, function_call_part.tool_call_id)
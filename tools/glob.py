@@ -1,32 +1,34 @@
 import os
-from pathlib import Path
+from operator import itemgetter
 from pydantic import BaseModel, Field
 from pydantic_ai.tools import ToolDefinition
+from ._sandbox import sandbox_path
+from ._schema import tool_schema
+from ._walk import IGNORE_DIRS, iter_glob
 
 def glob(working_directory: str, pattern: str, audit_log: str, path: str | None = None) -> str:
     try:
-        abs_working_dir = os.path.abspath(working_directory)
+        abs_path = sandbox_path(working_directory, path or "")
         
         if path is None:
             path = working_directory
         elif not os.path.isabs(path):
             path = os.path.join(working_directory, path)
         
-        abs_path = os.path.abspath(path)
-        if not abs_path.startswith(abs_working_dir):
+        if abs_path is None:
             return f'Error: Cannot search in path "{path}" as it is outside the permitted working directory'
         
-        # Use pathlib for recursive globbing
-        path_obj = Path(abs_path)
-        matches = [str(p) for p in path_obj.glob(pattern) if p.is_file()]
+        # Walk with os.scandir so file checks come from readdir, not an extra stat;
+        # DirEntry caches its stat result, so each file is stat'ed once for the sort key
+        matches = [(entry.path, entry.stat().st_mtime) for entry in iter_glob(abs_path, pattern, skip_dirs=IGNORE_DIRS)]
         
         if not matches:
             return f"No files found matching pattern '{pattern}' in {path}"
         
         # Sort by modification time (most recent first)
-        matches.sort(key=lambda x: os.path.getmtime(x) if os.path.exists(x) else 0, reverse=True)
+        matches.sort(key=itemgetter(1), reverse=True)
         
-        return "\n".join(matches)
+        return "\n".join(match_path for match_path, _ in matches)
     
     except FileNotFoundError:
         return f"Error: Directory not found: {path}"
@@ -41,7 +43,7 @@ class GlobParams(BaseModel):
         description="The glob pattern to match files against (e.g., '*.py', '**/*.js', 'src/**/*.ts')"
     )
     audit_log: str = Field(
-        description="Required: Concise summary of file search (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Search Python files in src', 'Find JavaScript test files', 'Locate configuration files'"
+        description="Required: Concise summary of file search (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Search Python files in src', 'Find JavaScript test files', 'Locate configuration files'"
     )
     path: str | None = Field(
         default=None,
@@ -59,10 +61,11 @@ Usage:
 - Returns matching file paths sorted by modification time
 - More efficient than bash find commands for file discovery
 - Use when you need to locate files by name or extension patterns
+- Skips .git, node_modules, virtualenvs, caches and dist/build output; pass a path inside one to search it
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the file search being performed.
+Provide a clear, concise summary (max 10 words) describing the file search being performed.
 Format like a git commit title: action + target + optional context.
 Examples: 'Search Python files', 'Find test configuration files', 'Locate TypeScript modules'""",
-    parameters_json_schema=GlobParams.model_json_schema(),
+    parameters_json_schema=tool_schema(GlobParams),
 )
\ No newline at end of file
@@ -1,9 +1,300 @@
 import re
 import os
-import glob
-from typing import Optional, Literal
+import functools
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional, Literal
 from pydantic import BaseModel, Field
 from pydantic_ai.tools import ToolDefinition
+from ._sandbox import sandbox_path
+from ._schema import tool_schema
+from ._walk import IGNORE_DIRS, iter_glob
+from ._uring import read_files, URING_BATCH
+
+try:
+    import hyperscan
+except ImportError:  # Optional: only used to skip non-matching files quickly
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:  # Optional: only used for patterns that are alternations of literals
+    ahocorasick = None
+
+# Patterns built only from constructs that `re` and Hyperscan read the same way: literals,
+# escaped punctuation, '.', anchors, alternation, plain or non-capturing groups, repeats
+# with an explicit minimum, and classes of literals and ranges. Everything else, such as
+# {,n}, \s/\w/\d, \b, lookarounds, backreferences and inline flags, stays on `re` alone
+PREFILTER_SAFE = re.compile(r"""
+    (?: [^\\\[\](){}.*+?|^$]
+      | \\[^A-Za-z0-9]
+      | [.*+?|^$]
+      | \{\d+(?:,\d*)?\}
+      | \((?!\?) | \(\?:
+      | \)
+      | \[\^?\]?(?:[^\\\[\]]|\\[^A-Za-z0-9])*\]
+    )*
+""", re.VERBOSE)
+
+@functools.lru_cache(maxsize=32)
+def _compile_prefilter(pattern: str, ignore_case: bool, multiline: bool):
+    """Compile pattern into a Hyperscan database for rejecting files, or None if unavailable.
+
+    Prefilter mode may report false positives but never false negatives, so files it
+    accepts are still matched with `re` and results are unchanged. That only holds where
+    both engines agree on the syntax, so anything outside PREFILTER_SAFE is not prefiltered.
+    Returns the database with a thread-local holder for per-thread scratch space.
+    """
+    if hyperscan is None or not PREFILTER_SAFE.fullmatch(pattern):
+        return None
+    # Case folding differs between the engines (e.g. re folds "ſ" to "s"), so
+    # case-insensitive searches stay on `re`
+    if ignore_case:
+        return None
+    # Patterns that can match empty text are not safe to prefilter over the whole file
+    if re.search(pattern, "") is not None:
+        return None
+    flags = (hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_ALLOWEMPTY
+             | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_MULTILINE)
+    if multiline:
+        flags |= hyperscan.HS_FLAG_DOTALL
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    try:
+        db.compile(expressions=[pattern.encode()], flags=[flags])
+    except hyperscan.error:
+        return None
+    return db, threading.local()
+
+def _may_match(prefilter, content: str) -> bool:
+    db, local = prefilter
+    # A scratch can only be used by one scan at a time, and read-only tools run in threads
+    scratch = getattr(local, "scratch", None)
+    if scratch is None:
+        scratch = local.scratch = hyperscan.Scratch(db)
+    found = []
+    # Re-encoding the decoded text guarantees valid UTF-8, which HS_FLAG_UTF8 requires
+    db.scan(content.encode("utf-8"), match_event_handler=lambda *_: found.append(True), scratch=scratch)
+    return bool(found)
+
+# Alternatives made only of characters that `re` matches literally
+LITERAL_ALTERNATIVE = re.compile(r"[\w /-]+")
+
+@functools.lru_cache(maxsize=32)
+def _compile_literals(pattern: str, ignore_case: bool):
+    """Build an Aho-Corasick automaton for a pattern like "foo|bar|baz", or None.
+
+    Literals contain no newlines, so one pass over the whole file tells exactly whether
+    any line matches. Case-insensitive searches stay on `re`, whose case folding differs
+    from str.lower().
+    """
+    if ahocorasick is None or ignore_case:
+        return None
+    words = pattern.split("|")
+    if not all(LITERAL_ALTERNATIVE.fullmatch(word) for word in words):
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+def _has_literal(automaton, content: str) -> bool:
+    return next(automaton.iter(content), None) is not None
+
+# Below this many files a process pool costs more than it saves
+PARALLEL_MIN_FILES = 500
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _process_pool() -> ProcessPoolExecutor:
+    """Shared worker pool for large scans, started once per session.
+
+    forkserver avoids forking the agent while its tool threads are running.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context(method))
+        return _pool
+
+def _drop_process_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        # Another thread may already have replaced it
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _parallel_map(fn, batches: list) -> list:
+    """Map fn over batches in the worker pool, restarting the pool once if a worker died."""
+    pool = _process_pool()
+    try:
+        return list(pool.map(fn, batches))
+    except BrokenProcessPool:
+        _drop_process_pool(pool)
+        return list(_process_pool().map(fn, batches))
+
+# Files that hold generated or vendored code rather than source
+SKIP_SUFFIXES = (".min.js",)
+
+# Bytes sniffed for a NUL to detect binary files, as ripgrep does
+BINARY_SNIFF_BYTES = 8192
+
+def _decode(raw: bytes) -> str:
+    # Matches text-mode reading: invalid UTF-8 dropped, universal newlines
+    content = raw.decode('utf-8', errors='ignore')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+# String anchors and lookarounds, which can see past the end of a line in the whole text
+WHOLE_TEXT_UNSAFE = ('\\A', '\\Z', '(?=', '(?!', '(?<')
+
+def _iter_line_matches(regex: re.Pattern, content: str) -> Iterator[tuple[int, str, re.Match, int, int]]:
+    """Yield per-line matches as (line_num, line, match, line_start, line_end) without splitting content.
+
+    A MULTILINE search over the whole text finds the next line that can match; only that
+    line is sliced out and searched on its own, so results equal a line-by-line scan.
+    """
+    if any(token in regex.pattern for token in WHOLE_TEXT_UNSAFE):
+        # These mean something different per line than across the whole text, so a line
+        # could match alone while the whole-text search skips it; use the slow path
+        candidates = None
+    else:
+        candidates = re.compile(regex.pattern, regex.flags | re.MULTILINE)
+    line_num, line_start = 1, 0
+    candidate = candidates.search(content) if candidates else None
+    while True:
+        if candidates:
+            if candidate is None:
+                break
+            # Line numbers are counted incrementally, so each newline is visited once
+            next_start = content.rfind('\n', line_start, candidate.start()) + 1 or line_start
+            line_num += content.count('\n', line_start, next_start)
+            line_start = next_start
+        line_end = content.find('\n', line_start)
+        if line_end < 0:
+            line_end = len(content)
+        line = content[line_start:line_end]
+        for match in regex.finditer(line):
+            yield line_num, line, match, line_start, line_end
+        if line_end == len(content):
+            break
+        if candidates:
+            candidate = candidates.search(content, line_end + 1)
+        else:
+            line_num, line_start = line_num + 1, line_end + 1
+
+def _lines_before(content: str, line_start: int, n: int) -> list[str]:
+    """Return up to n lines preceding the line that starts at line_start."""
+    lines = []
+    end = line_start - 1
+    while n > 0 and end >= 0:
+        start = content.rfind('\n', 0, end) + 1
+        lines.append(content[start:end])
+        end = start - 1
+        n -= 1
+    lines.reverse()
+    return lines
+
+def _lines_after(content: str, line_end: int, n: int) -> list[str]:
+    """Return up to n lines following the line that ends at line_end."""
+    lines = []
+    while n > 0 and line_end < len(content):
+        start = line_end + 1
+        line_end = content.find('\n', start)
+        if line_end < 0:
+            line_end = len(content)
+        lines.append(content[start:line_end])
+        n -= 1
+    return lines
+
+def _scan_files(file_path: str, content: str, regex: re.Pattern, multiline: bool,
+                before: int, after: int, line_number: bool) -> tuple[bool, list[str]]:
+    # The first match is enough to list the file
+    if multiline:
+        return regex.search(content) is not None, []
+    return next(_iter_line_matches(regex, content), None) is not None, []
+
+def _scan_count(file_path: str, content: str, regex: re.Pattern, multiline: bool,
+                before: int, after: int, line_number: bool) -> tuple[bool, list[str]]:
+    find = regex.finditer if multiline else functools.partial(_iter_line_matches, regex)
+    total = sum(1 for _ in find(content))
+    if not total:
+        return False, []
+    return True, [f"{file_path}: {total}"]
+
+def _scan_content(file_path: str, content: str, regex: re.Pattern, multiline: bool,
+                  before: int, after: int, line_number: bool) -> tuple[bool, list[str]]:
+    results = []
+    if multiline:
+        for match in regex.finditer(content):
+            results.append(f"{file_path}: {match.group()}")
+        return bool(results), results
+    
+    matched = False
+    for line_num, line, match, line_start, line_end in _iter_line_matches(regex, content):
+        matched = True
+        if before > 0:
+            context_lines = _lines_before(content, line_start, before)
+            first = line_num - len(context_lines)
+            for i, context_line in enumerate(context_lines, first):
+                prefix = f"{i}-" if line_number else ""
+                results.append(f"{file_path}:{prefix}{context_line}")
+        
+        # Add matching line
+        prefix = f"{line_num}:" if line_number else ""
+        results.append(f"{file_path}:{prefix}{line}")
+        
+        if after > 0:
+            for i, context_line in enumerate(_lines_after(content, line_end, after), line_num + 1):
+                prefix = f"{i}-" if line_number else ""
+                results.append(f"{file_path}:{prefix}{context_line}")
+    return matched, results
+
+SCANNERS = {
+    "content": _scan_content,
+    "files_with_matches": _scan_files,
+    "count": _scan_count,
+}
+
+def _scan_batch(file_paths: list[str], pattern: str, flags: int, ignore_case: bool, multiline: bool,
+                mode: str, before: int, after: int, line_number: bool) -> list[tuple[bool, list[str]]]:
+    """Read a batch of files in one go, then search each of them.
+
+    Returns whether each file matched and its output lines, in the order of file_paths.
+    """
+    # All compiles are cached, so each worker process compiles the pattern once
+    regex = re.compile(pattern, flags)
+    literals = _compile_literals(pattern, ignore_case)
+    # A literal scan is exact, so the Hyperscan prefilter has nothing left to reject
+    prefilter = None if literals is not None else _compile_prefilter(pattern, ignore_case, multiline)
+    scan = SCANNERS[mode]
+    contents = read_files(file_paths)
+    scanned = []
+    for file_path in file_paths:
+        raw = contents.get(file_path)
+        if raw is None or raw.find(b"\x00", 0, BINARY_SNIFF_BYTES) >= 0:
+            scanned.append((False, []))
+            continue
+        content = _decode(raw)
+        if literals is not None:
+            if not _has_literal(literals, content):
+                scanned.append((False, []))
+                continue
+            if mode == "files_with_matches":
+                scanned.append((True, []))
+                continue
+        elif prefilter is not None and not _may_match(prefilter, content):
+            scanned.append((False, []))
+            continue
+        scanned.append(scan(file_path, content, regex, multiline, before, after, line_number))
+    return scanned
 
 def grep(
     working_directory: str,
@@ -22,20 +313,19 @@ def grep(
     multiline: bool = False
 ) -> str:
     try:
-        abs_working_dir = os.path.abspath(working_directory)
+        abs_path = sandbox_path(working_directory, path or "")
         
         if path is None:
             path = working_directory
         elif not os.path.isabs(path):
             path = os.path.join(working_directory, path)
         
-        abs_path = os.path.abspath(path)
-        if not abs_path.startswith(abs_working_dir):
+        if abs_path is None:
             return f'Error: Cannot search in path "{path}" as it is outside the permitted working directory'
         
         # Determine files to search
         if include:
-            search_pattern = os.path.join(abs_path, include)
+            search_pattern = include
         elif file_type:
             type_patterns = {
                 "py": "**/*.py",
@@ -48,80 +338,56 @@ def grep(
                 "h": "**/*.{h,hpp}",
             }
             if file_type in type_patterns:
-                search_pattern = os.path.join(abs_path, type_patterns[file_type])
+                search_pattern = type_patterns[file_type]
             else:
-                search_pattern = os.path.join(abs_path, f"**/*.{file_type}")
+                search_pattern = f"**/*.{file_type}"
         else:
-            search_pattern = os.path.join(abs_path, "**/*")
+            search_pattern = "**/*"
         
-        files = glob.glob(search_pattern, recursive=True)
-        files = [f for f in files if os.path.isfile(f)]
+        if os.path.isfile(abs_path):
+            files = [abs_path]
+        else:
+            # Hidden files are skipped, as glob.glob did
+            files = [
+                entry.path
+                for entry in iter_glob(abs_path, search_pattern, include_hidden=False, skip_dirs=IGNORE_DIRS)
+                if not entry.name.endswith(SKIP_SUFFIXES)
+            ]
         
         # Compile regex pattern
         flags = re.IGNORECASE if ignore_case else 0
         if multiline:
             flags |= re.MULTILINE | re.DOTALL
         
-        regex = re.compile(pattern, flags)
+        if mode not in SCANNERS:
+            return f"Error: Unknown mode '{mode}'"
+        
+        # Compile up front so an invalid pattern is reported before any scanning
+        re.compile(pattern, flags)
+
+        # Context applies to both sides of each match
+        if context > 0:
+            before = after = context
         
         results = []
         file_matches = []
+
+        # Sorted so parallel and serial scans give the same, deterministic order
+        files.sort()
+        scan = functools.partial(
+            _scan_batch, pattern=pattern, flags=flags, ignore_case=ignore_case, multiline=multiline,
+            mode=mode, before=before, after=after, line_number=line_number
+        )
+        batches = [files[i:i + URING_BATCH] for i in range(0, len(files), URING_BATCH)]
+        if len(files) >= PARALLEL_MIN_FILES:
+            scanned = _parallel_map(scan, batches)
+        else:
+            scanned = map(scan, batches)
         
-        for file_path in files:
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                if multiline:
-                    matches = list(regex.finditer(content))
-                else:
-                    lines = content.split('\n')
-                    matches = []
-                    for i, line in enumerate(lines):
-                        for match in regex.finditer(line):
-                            matches.append((i + 1, line, match))
-                
-                if matches:
-                    file_matches.append(file_path)
-                    
-                    if mode == "content":
-                        if multiline:
-                            for match in matches:
-                                results.append(f"{file_path}: {match.group()}")
-                        else:
-                            for line_num, line, match in matches:
-                                context_lines = []
-                                
-                                # Add context
-                                if context > 0:
-                                    before = after = context
-                                
-                                if before > 0:
-                                    start = max(0, line_num - before - 1)
-                                    for i in range(start, line_num - 1):
-                                        if i < len(lines):
-                                            prefix = f"{i+1}-" if line_number else ""
-                                            context_lines.append(f"{file_path}:{prefix}{lines[i]}")
-                                
-                                # Add matching line
-                                prefix = f"{line_num}:" if line_number else ""
-                                context_lines.append(f"{file_path}:{prefix}{line}")
-                                
-                                if after > 0:
-                                    end = min(len(lines), line_num + after)
-                                    for i in range(line_num, end):
-                                        if i < len(lines):
-                                            prefix = f"{i+1}-" if line_number else ""
-                                            context_lines.append(f"{file_path}:{prefix}{lines[i]}")
-                                
-                                results.extend(context_lines)
-                    
-                    elif mode == "count":
-                        count = len(matches)
-                        results.append(f"{file_path}: {count}")
-            
-            except (UnicodeDecodeError, PermissionError):
-                continue
+        for file_path, (matched, file_results) in zip(files, itertools.chain.from_iterable(scanned)):
+            if matched:
+                file_matches.append(file_path)
+                results.extend(file_results)
         
         if mode == "files_with_matches":
             results = file_matches
@@ -144,7 +410,7 @@ class GrepParams(BaseModel):
         description="The regular expression pattern to search for in file contents"
     )
     audit_log: str = Field(
-        description="Required: Concise summary of search (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Search error handling patterns', 'Find function definitions', 'Locate import statements'"
+        description="Required: Concise summary of search (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Search error handling patterns', 'Find function definitions', 'Locate import statements'"
     )
     path: str | None = Field(
         default=None,
@@ -207,10 +473,11 @@ Usage:
 - Use case_insensitive=True for flexible matching  
 - Returns matching lines with line numbers and file paths
 - More efficient than bash grep commands for code search
+- Skips .git, node_modules, virtualenvs, caches and dist/build output; pass a path inside one to search it
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the search being performed.
+Provide a clear, concise summary (max 10 words) describing the search being performed.
 Format like a git commit title: action + target + optional context.
 Examples: 'Search error patterns', 'Find function definitions', 'Locate configuration variables'""",
-    parameters_json_schema=GrepParams.model_json_schema(),
+    parameters_json_schema=tool_schema(GrepParams),
 )
\ No newline at end of file
@@ -0,0 +1,87 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Protocol
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelResponse
+
+# Fields that change between otherwise identical requests and must not affect the key
+VOLATILE_KEYS = {"timestamp", "usage", "provider_response_id", "provider_details"}
+
+
+class CacheBackend(Protocol):
+    """Storage for serialized model responses keyed by request hash."""
+
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes) -> None: ...
+
+
+class MemoryCache:
+    """In-process LRU cache."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, key: str) -> bytes | None:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class DiskCache:
+    """Persistent cache backed by the optional `diskcache` package."""
+
+    def __init__(self, directory: str = ".llm_cache"):
+        try:
+            import diskcache
+        except ImportError as e:
+            raise ImportError("DiskCache requires the 'diskcache' package: pip install diskcache") from e
+        self._cache = diskcache.Cache(directory)
+
+    def get(self, key: str) -> bytes | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._cache.set(key, value)
+
+
+def _without_volatile(fields: dict) -> dict:
+    return {k: v for k, v in fields.items() if k not in VOLATILE_KEYS}
+
+
+def _strip_volatile(messages: list[dict]) -> list[dict]:
+    # Only message and part metadata: tool-call args and tool results may
+    # legitimately carry keys such as "timestamp" that change the request
+    stripped = []
+    for message in messages:
+        message = _without_volatile(message)
+        if "parts" in message:
+            message["parts"] = [_without_volatile(part) for part in message["parts"]]
+        stripped.append(message)
+    return stripped
+
+
+def cache_key(model_name: str, messages: list[ModelMessage], tool_names: list[str]) -> str:
+    """Hash the model, conversation and available tools into a cache key."""
+    serialized = _strip_volatile(ModelMessagesTypeAdapter.dump_python(messages, mode="json"))
+    payload = json.dumps(
+        {"model": model_name, "messages": serialized, "tools": sorted(tool_names)},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def dump_response(response: ModelResponse) -> bytes:
+    return ModelMessagesTypeAdapter.dump_json([response])
+
+
+def load_response(data: bytes) -> ModelResponse:
+    return ModelMessagesTypeAdapter.validate_json(data)[0]
@@ -1,27 +1,23 @@
 import os
 from pydantic import BaseModel, Field
 from pydantic_ai.tools import ToolDefinition
+from ._sandbox import sandbox_path
+from ._schema import tool_schema
+from ._walk import IGNORE_DIRS, iter_glob
 
 def ls(working_directory: str, audit_log: str, directory: str = "./") -> str:
    try:
-       abs_working_dir = os.path.abspath(working_directory)
+       abs_directory = sandbox_path(working_directory, directory)
        
        # Handle directory path - if it's relative, make it relative to working_directory
        if not os.path.isabs(directory):
            directory = os.path.join(working_directory, directory)
        
-       abs_directory = os.path.abspath(directory)
-       if not abs_directory.startswith(abs_working_dir):
+       if abs_directory is None:
            return f'Error: Cannot list directory "{directory}" as it is outside the permitted working directory'
        
-       if abs_directory.endswith("/"):
-           abs_directory = abs_directory[:-1]
-       
-       files_list = [
-           f"{abs_directory}/{os.path.join(root, filename).replace(abs_directory, '').lstrip(os.path.sep)}"
-           for root, dirs, files in os.walk(abs_directory)
-           for filename in files
-       ]
+       # entry.path is already absolute since the walk starts from an absolute directory
+       files_list = sorted(entry.path for entry in iter_glob(abs_directory, "**", skip_dirs=IGNORE_DIRS))
        
        if not files_list:
            return f"No files found in {directory}"
@@ -39,7 +35,7 @@ def ls(working_directory: str, audit_log: str, directory: str = "./") -> str:
 class LsParams(BaseModel):
     """Parameters for the ls tool."""
     audit_log: str = Field(
-        description="Required: Concise summary of directory listing (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'List project source files', 'Check directory structure', 'Browse configuration folder'"
+        description="Required: Concise summary of directory listing (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'List project source files', 'Check directory structure', 'Browse configuration folder'"
     )
     directory: str = Field(
         default="./",
@@ -58,10 +54,11 @@ Usage:
 - Recursively searches subdirectories
 - Use before creating files to verify directory structure
 - Paths are relative to the working directory
+- Skips .git, node_modules, virtualenvs, caches and dist/build output; pass a path inside one to list it
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the directory listing being performed.
+Provide a clear, concise summary (max 10 words) describing the directory listing being performed.
 Format like a git commit title: action + target + optional context.
 Examples: 'List project files', 'Check directory structure', 'Browse source folder'""",
-    parameters_json_schema=LsParams.model_json_schema(),
+    parameters_json_schema=tool_schema(LsParams),
 )
\ No newline at end of file
@@ -1,47 +1,72 @@
-import os
 from typing import List, Dict
+from ._fileio import atomic_write, mapped_text
 from pydantic import BaseModel, Field, field_validator
 from pydantic_ai.tools import ToolDefinition
+from ._sandbox import sandbox_path
+from ._schema import check_audit_log, tool_schema
+
+def _find_all(content, search: bytes, limit: int | None = None) -> list[int]:
+    """Return start offsets of non-overlapping occurrences of search, up to limit."""
+    positions = []
+    step = len(search) or 1
+    idx = content.find(search)
+    while idx >= 0 and len(positions) != limit:
+        positions.append(idx)
+        start = idx + step
+        # mmap.find clamps a start past the end instead of failing
+        idx = content.find(search, start) if start <= len(content) else -1
+    return positions
+
+def _splice(view: memoryview, spans: list[tuple[int, int, bytes, int]]) -> list:
+    """Interleave slices of view with the replacement for each sorted (start, end, replace, i) span."""
+    segments = []
+    cursor = 0
+    for start, end, replace, _ in spans:
+        segments.append(view[cursor:start])
+        segments.append(replace)
+        cursor = end
+    segments.append(view[cursor:])
+    return segments
 
 def multiedit(working_directory: str, path: str, edits: List[Dict[str, str]], audit_log: str) -> str:
     try:
-        abs_working_dir = os.path.abspath(working_directory)
-        abs_file_path = os.path.abspath(os.path.join(working_directory, path))
-        if not abs_file_path.startswith(abs_working_dir):
+        abs_file_path = sandbox_path(working_directory, path)
+        if abs_file_path is None:
             return f'Error: Cannot edit "{path}" as it is outside the permitted working directory'
         
-        with open(abs_file_path, 'r') as f:
-            content = f.read()
-        
-        # Validate all edits first
-        for i, edit in enumerate(edits):
-            search = edit.get("search", edit.get("old_string", ""))
-            replace = edit.get("replace", edit.get("new_string", ""))
-            global_replace = edit.get("global_replace", edit.get("replace_all", False))
-            
-            if search == replace:
-                return f"Error: Edit {i+1}: search and replace cannot be the same"
-            
-            if search not in content:
-                return f"Error: Edit {i+1}: search text not found in {path}"
-            
-            if not global_replace and content.count(search) > 1:
-                return f"Error: Edit {i+1}: search text appears multiple times. Use global_replace=True"
-        
-        # Apply edits sequentially
-        current_content = content
+        # Encode each edit once; searches run on the file's bytes
+        operations = []
         for edit in edits:
             search = edit.get("search", edit.get("old_string", ""))
             replace = edit.get("replace", edit.get("new_string", ""))
             global_replace = edit.get("global_replace", edit.get("replace_all", False))
-            
-            if global_replace:
-                current_content = current_content.replace(search, replace)
-            else:
-                current_content = current_content.replace(search, replace, 1)
+            operations.append((search == replace, search.encode(), replace.encode(), global_replace))
         
-        with open(abs_file_path, 'w') as f:
-            f.write(current_content)
+        with mapped_text(abs_file_path) as content:
+            # Validate all edits first, collecting the spans each one replaces in the original
+            spans = []
+            for i, (unchanged, search, replace, global_replace) in enumerate(operations):
+                if unchanged:
+                    return f"Error: Edit {i+1}: search and replace cannot be the same"
+                
+                # Two positions are enough to tell a unique match from an ambiguous one
+                positions = _find_all(content, search, None if global_replace else 2)
+                if not positions:
+                    return f"Error: Edit {i+1}: search text not found in {path}"
+                
+                if not global_replace and len(positions) > 1:
+                    return f"Error: Edit {i+1}: search text appears multiple times. Use global_replace=True"
+                
+                spans.extend((start, start + len(search), replace, i) for start in positions)
+            
+            spans.sort(key=lambda span: (span[0], span[3]))
+            for previous, span in zip(spans, spans[1:]):
+                if span[0] < previous[1]:
+                    return f"Error: Edit {span[3]+1}: search text overlaps edit {previous[3]+1}"
+            
+            # Write the replacements between untouched slices of the original in one pass
+            with memoryview(content) as view:
+                atomic_write(abs_file_path, _splice(view, spans))
         
         return f"Applied {len(edits)} edits to {path}"
     
@@ -72,21 +97,16 @@ class MultieditParams(BaseModel):
         description="The path to the file to modify"
     )
     edits: List[EditOperation] = Field(
-        description="Array of edit operations to perform sequentially"
+        description="Array of edit operations to perform, each matched against the original file content"
     )
     audit_log: str = Field(
-        description="Required: Concise summary of changes (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Refactor authentication module methods', 'Update multiple API endpoint handlers', 'Fix various null pointer exceptions'"
+        description="Required: Concise summary of changes (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Refactor authentication module methods', 'Update multiple API endpoint handlers', 'Fix various null pointer exceptions'"
     )
     
     @field_validator('audit_log')
     @classmethod
     def validate_audit_log_length(cls, v: str) -> str:
-        words = len(v.strip().split())
-        if words > 10:
-            raise ValueError(f'Audit log must be maximum 10 words, got {words} words')
-        if not v.strip():
-            raise ValueError('Audit log cannot be empty')
-        return v
+        return check_audit_log(v)
 
 
 multiedit_tool_definition = ToolDefinition(
@@ -96,13 +116,13 @@ multiedit_tool_definition = ToolDefinition(
 Usage:
 - Read the file first to understand its current content
 - Provide array of edit operations (search and replace pairs)
-- All edits are applied sequentially in the order provided
+- Every search text must match the original file content; overlapping edits are rejected
 - More efficient than multiple single edit operations
 - All edits must succeed or none are applied (atomic operation)
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the batch changes being made.
+Provide a clear, concise summary (max 10 words) describing the batch changes being made.
 Format like a git commit title: action + target + optional context.
 Examples: 'Refactor user authentication module', 'Update multiple deprecated function calls'""",
-    parameters_json_schema=MultieditParams.model_json_schema(),
+    parameters_json_schema=tool_schema(MultieditParams),
 )
\ No newline at end of file
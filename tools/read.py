@@ -1,28 +1,61 @@
+import codecs
 import os
+from ._fileio import mapped_text
 from pydantic import BaseModel, Field
 from pydantic_ai.tools import ToolDefinition
+from ._sandbox import sandbox_path
+from ._schema import tool_schema
 
 MAX_CHARS = 10000
+MAX_UTF8_BYTES = 4
 
 def read(working_directory: str, path: str, audit_log: str, skip: int = 0, lines: int | None = None) -> str:
    try:
-       abs_working_dir = os.path.abspath(working_directory)
-       abs_file_path = os.path.abspath(os.path.join(working_directory, path))
-       if not abs_file_path.startswith(abs_working_dir):
+       abs_file_path = sandbox_path(working_directory, path)
+       if abs_file_path is None:
            return f'Error: Cannot read "{path}" as it is outside the permitted working directory'
        
-       with open(abs_file_path, 'r') as f:
-           if skip == 0 and lines is None:
-               return f.read(MAX_CHARS)
-           
-           file_lines = f.readlines()
-           start_idx = skip
-           
-           if start_idx >= len(file_lines):
+       if skip == 0 and lines is None:
+           # One unbuffered read of the most bytes MAX_CHARS can take, no TextIOWrapper
+           fd = os.open(abs_file_path, os.O_RDONLY)
+           try:
+               raw = os.read(fd, MAX_CHARS * MAX_UTF8_BYTES)
+           finally:
+               os.close(fd)
+           # A non-final decode holds back a character cut off at the end of the read
+           text = codecs.getincrementaldecoder("utf-8")().decode(raw)
+           if "\r" in text:
+               text = text.replace("\r\n", "\n").replace("\r", "\n")
+           return text[:MAX_CHARS]
+       
+       with mapped_text(abs_file_path) as data:
+           # Step over skipped lines with find(), so only their newlines are touched
+           start = 0
+           for _ in range(skip):
+               if start >= len(data):
+                   break
+               newline = data.find(b"\n", start)
+               start = len(data) if newline < 0 else newline + 1
+           if start >= len(data):
                return f"Error: Skip value {skip} exceeds file length"
            
-           end_idx = start_idx + lines if lines else len(file_lines)
-           return ''.join(file_lines[start_idx:end_idx])[:MAX_CHARS]
+           if lines:
+               end = start
+               for _ in range(lines):
+                   if end >= len(data):
+                       break
+                   newline = data.find(b"\n", end)
+                   end = len(data) if newline < 0 else newline + 1
+           else:
+               end = len(data)
+           
+           # No character takes more than MAX_UTF8_BYTES, so this is enough for MAX_CHARS;
+           # back off continuation bytes so the slice ends on a character boundary
+           if end - start > MAX_CHARS * MAX_UTF8_BYTES:
+               end = start + MAX_CHARS * MAX_UTF8_BYTES
+               while end > start and data[end] & 0xC0 == 0x80:
+                   end -= 1
+           return data[start:end].decode("utf-8")[:MAX_CHARS]
            
    except FileNotFoundError:
        return f"Error: File not found: {path}"
@@ -38,7 +71,7 @@ class ReadParams(BaseModel):
         description="The path to the file to read, relative to the working directory"
     )
     audit_log: str = Field(
-        description="Required: Concise summary of file reading (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Read configuration file', 'Examine source code', 'Check log file contents'"
+        description="Required: Concise summary of file reading (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Read configuration file', 'Examine source code', 'Check log file contents'"
     )
     skip: int = Field(
         default=0,
@@ -65,8 +98,8 @@ Usage:
 - You can call multiple read tools in parallel to examine multiple files efficiently
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the file being read.
+Provide a clear, concise summary (max 10 words) describing the file being read.
 Format like a git commit title: action + target + optional context.
 Examples: 'Read configuration file', 'Examine source code', 'Check documentation'""",
-    parameters_json_schema=ReadParams.model_json_schema(),
+    parameters_json_schema=tool_schema(ReadParams),
 )
\ No newline at end of file
@@ -0,0 +1,63 @@
+import json
+import os
+import time
+
+
+class SemanticCache:
+    """Cache of final responses looked up by embedding similarity of the user input.
+
+    Requires the optional `faiss-cpu` and `sentence-transformers` packages.
+    """
+
+    def __init__(self, embed_model: str = "sentence-transformers/all-MiniLM-L6-v2", threshold: float = 0.92,
+                 ttl: float = 3600, directory: str | None = None):
+        try:
+            import faiss
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("SemanticCache requires 'faiss-cpu' and 'sentence-transformers': "
+                              "pip install faiss-cpu sentence-transformers") from e
+        self._faiss = faiss
+        self._model = SentenceTransformer(embed_model)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.directory = directory
+        self._index = faiss.IndexFlatIP(self._model.get_sentence_embedding_dimension())
+        self._entries: list[tuple[float, str]] = []  # (created_at, response) per index row
+        if directory and os.path.exists(os.path.join(directory, "entries.json")):
+            self._load()
+
+    def _embed(self, text: str):
+        # Normalized vectors make inner product equal to cosine similarity
+        return self._model.encode([text], normalize_embeddings=True).astype("float32")
+
+    def lookup(self, user_input: str) -> str | None:
+        """Return a cached response for a near-duplicate input, if one is fresh enough."""
+        if self._index.ntotal == 0:
+            return None
+        scores, ids = self._index.search(self._embed(user_input), min(4, self._index.ntotal))
+        now = time.time()
+        for score, i in zip(scores[0], ids[0]):
+            if score < self.threshold:
+                break
+            created_at, response = self._entries[i]
+            if now - created_at <= self.ttl:
+                return response
+        return None
+
+    def store(self, user_input: str, response: str) -> None:
+        self._index.add(self._embed(user_input))
+        self._entries.append((time.time(), response))
+        if self.directory:
+            self._save()
+
+    def _load(self) -> None:
+        self._index = self._faiss.read_index(os.path.join(self.directory, "index.faiss"))
+        with open(os.path.join(self.directory, "entries.json"), "r") as f:
+            self._entries = [tuple(entry) for entry in json.load(f)]
+
+    def _save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._faiss.write_index(self._index, os.path.join(self.directory, "index.faiss"))
+        with open(os.path.join(self.directory, "entries.json"), "w") as f:
+            json.dump(self._entries, f)
@@ -1,20 +1,64 @@
-import json
+import orjson
 import os
+from collections import OrderedDict
 from typing import Literal
+from ._fileio import atomic_write
 from pydantic import BaseModel, Field
 from pydantic_ai.tools import ToolDefinition
+from ._schema import tool_schema
 
 TODO_FILE = "todos.json"
 
+# Parsed todos per file, with the (st_mtime_ns, st_size) they were loaded at,
+# least recently used first
+TODO_CACHE_SIZE = 32
+_TODO_CACHE: OrderedDict[str, tuple[tuple[int, int], list]] = OrderedDict()
+
+def _cache_todos(todo_path: str, key: tuple[int, int], todos: list) -> None:
+    _TODO_CACHE[todo_path] = (key, todos)
+    _TODO_CACHE.move_to_end(todo_path)
+    if len(_TODO_CACHE) > TODO_CACHE_SIZE:
+        _TODO_CACHE.popitem(last=False)
+
+def _load(todo_path: str) -> list | None:
+    """Return the todos in todo_path, or None if it doesn't exist.
+
+    The parsed list is reused while the file's mtime and size are unchanged.
+    """
+    try:
+        f = open(todo_path, 'rb')
+    except FileNotFoundError:
+        _TODO_CACHE.pop(todo_path, None)
+        return None
+    with f:
+        # fstat the file that was opened, so the key can't describe a different one
+        st = os.fstat(f.fileno())
+        key = (st.st_mtime_ns, st.st_size)
+        cached = _TODO_CACHE.get(todo_path)
+        if cached is not None and cached[0] == key:
+            _TODO_CACHE.move_to_end(todo_path)
+            return cached[1]
+        todos = orjson.loads(f.read())
+    _cache_todos(todo_path, key, todos)
+    return todos
+
+def _save(todo_path: str, todos: list) -> None:
+    """Atomically replace todo_path with todos and keep the cache in step with the new file."""
+    try:
+        # One temp-file write, fsync and rename per save, however many ops it holds
+        atomic_write(todo_path, [orjson.dumps(todos, option=orjson.OPT_INDENT_2)])
+        st = os.stat(todo_path)
+    except BaseException:
+        # todos may already be mutated in the cache; force a reload from disk
+        _TODO_CACHE.pop(todo_path, None)
+        raise
+    _cache_todos(todo_path, (st.st_mtime_ns, st.st_size), todos)
+
 def todo_list(working_directory: str, audit_log: str) -> str:
     """List all todos"""
     try:
         todo_path = os.path.join(working_directory, TODO_FILE)
-        if not os.path.exists(todo_path):
-            return "No todos found"
-        
-        with open(todo_path, 'r') as f:
-            todos = json.load(f)
+        todos = _load(todo_path)
         
         if not todos:
             return "No todos found"
@@ -32,16 +76,12 @@ def todo_add(working_directory: str, task: str, audit_log: str) -> str:
     """Add a new todo"""
     try:
         todo_path = os.path.join(working_directory, TODO_FILE)
-        
-        todos = []
-        if os.path.exists(todo_path):
-            with open(todo_path, 'r') as f:
-                todos = json.load(f)
+        todos = _load(todo_path)
+        if todos is None:
+            todos = []
         
         todos.append({"task": task, "done": False})
-        
-        with open(todo_path, 'w') as f:
-            json.dump(todos, f, indent=2)
+        _save(todo_path, todos)
         
         return f"Added: {task}"
     except Exception as e:
@@ -51,19 +91,15 @@ def todo_done(working_directory: str, index: int, audit_log: str) -> str:
     """Mark todo as done"""
     try:
         todo_path = os.path.join(working_directory, TODO_FILE)
-        if not os.path.exists(todo_path):
+        todos = _load(todo_path)
+        if todos is None:
             return "No todos found"
         
-        with open(todo_path, 'r') as f:
-            todos = json.load(f)
-        
         if index < 1 or index > len(todos):
             return f"Invalid todo number: {index}"
         
         todos[index - 1]["done"] = True
-        
-        with open(todo_path, 'w') as f:
-            json.dump(todos, f, indent=2)
+        _save(todo_path, todos)
         
         return f"Marked done: {todos[index - 1]['task']}"
     except Exception as e:
@@ -73,31 +109,95 @@ def todo_remove(working_directory: str, index: int, audit_log: str) -> str:
     """Remove a todo"""
     try:
         todo_path = os.path.join(working_directory, TODO_FILE)
-        if not os.path.exists(todo_path):
+        todos = _load(todo_path)
+        if todos is None:
             return "No todos found"
         
-        with open(todo_path, 'r') as f:
-            todos = json.load(f)
-        
         if index < 1 or index > len(todos):
             return f"Invalid todo number: {index}"
         
         task = todos.pop(index - 1)["task"]
-        
-        with open(todo_path, 'w') as f:
-            json.dump(todos, f, indent=2)
+        _save(todo_path, todos)
         
         return f"Removed: {task}"
     except Exception as e:
         return f"Error: {e}"
 
+def todo_batch(working_directory: str, ops: list[dict], audit_log: str) -> str:
+    """Apply several add/done/remove operations with one load and one save.
+
+    Indices refer to the list as it was before the batch, so removals don't shift
+    later operations. Nothing is saved if any operation is invalid.
+    """
+    try:
+        todo_path = os.path.join(working_directory, TODO_FILE)
+        todos = _load(todo_path)
+        if todos is None:
+            todos = []
+        
+        to_remove = set()
+        for op in ops:
+            action, index = op.get("action"), op.get("index")
+            if action == "add":
+                if not op.get("task"):
+                    return "Error: Task required for add action"
+            elif action in ("done", "remove"):
+                if not index:
+                    return f"Error: Index required for {action} action"
+                if index < 1 or index > len(todos):
+                    return f"Invalid todo number: {index}"
+                if action == "remove":
+                    if index in to_remove:
+                        return f"Error: Todo number {index} is removed more than once"
+                    to_remove.add(index)
+            else:
+                return f"Error: Unknown batch action '{action}'"
+        
+        results = []
+        added = []
+        removed = set()
+        for op in ops:
+            action = op["action"]
+            if action == "add":
+                added.append({"task": op["task"], "done": False})
+                results.append(f"Added: {op['task']}")
+            elif action == "done":
+                todos[op["index"] - 1]["done"] = True
+                results.append(f"Marked done: {todos[op['index'] - 1]['task']}")
+            else:
+                removed.add(op["index"])
+                results.append(f"Removed: {todos[op['index'] - 1]['task']}")
+        
+        # Rebuild in place so the cached list and the saved list stay the same object
+        todos[:] = [todo for i, todo in enumerate(todos, 1) if i not in removed] + added
+        _save(todo_path, todos)
+        
+        return "\n".join(results)
+    except Exception as e:
+        return f"Error: {e}"
+
+class TodoOp(BaseModel):
+    """A single operation in a todo batch."""
+    action: Literal["add", "done", "remove"] = Field(
+        description="Action to perform: 'add', 'done', 'remove'"
+    )
+    task: str | None = Field(
+        default=None,
+        description="Task description (required for 'add')"
+    )
+    index: int | None = Field(
+        default=None,
+        description="Todo number before the batch is applied (required for 'done' and 'remove')",
+        gt=0
+    )
+
 class TodoParams(BaseModel):
     """Parameters for the todo tool."""
-    action: Literal["list", "add", "done", "remove"] = Field(
-        description="Action to perform: 'list', 'add', 'done', 'remove'"
+    action: Literal["list", "add", "done", "remove", "batch"] = Field(
+        description="Action to perform: 'list', 'add', 'done', 'remove', 'batch'"
     )
     audit_log: str = Field(
-        description="Required: Concise summary of todo action (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'List project tasks', 'Add feature implementation task', 'Mark task complete'"
+        description="Required: Concise summary of todo action (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'List project tasks', 'Add feature implementation task', 'Mark task complete'"
     )
     task: str | None = Field(
         default=None,
@@ -108,6 +208,10 @@ class TodoParams(BaseModel):
         description="Todo number (required for 'done' and 'remove')",
         gt=0
     )
+    ops: list[TodoOp] | None = Field(
+        default=None,
+        description="Operations to apply together (required for 'batch')"
+    )
     
 
 
@@ -120,30 +224,34 @@ Usage:
 - Use 'done' to mark tasks complete and track progress
 - Use 'list' to see current task status
 - Use 'remove' to clean up irrelevant tasks
+- Use 'batch' with ops to add, complete or remove several tasks in one call;
+  todo numbers in ops refer to the list before the batch
 - Essential for breaking down complex tasks into manageable steps
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the todo action being performed.
+Provide a clear, concise summary (max 10 words) describing the todo action being performed.
 Format like a git commit title: action + target + optional context.
 Examples: 'List project tasks', 'Add new task', 'Mark task complete', 'Remove completed task'""",
-    parameters_json_schema=TodoParams.model_json_schema(),
+    parameters_json_schema=tool_schema(TodoParams),
 )
 
-def todo(working_directory: str, action: str, audit_log: str, task: str | None = None, index: int | None = None) -> str:
+# Action name to handler, each taking (working_directory, audit_log, task, index, ops)
+_ACTIONS = {
+    "list": lambda wd, log, task, index, ops: todo_list(wd, log),
+    "add": lambda wd, log, task, index, ops: (
+        todo_add(wd, task, log) if task else "Error: Task required for add action"),
+    "done": lambda wd, log, task, index, ops: (
+        todo_done(wd, index, log) if index else "Error: Index required for done action"),
+    "remove": lambda wd, log, task, index, ops: (
+        todo_remove(wd, index, log) if index else "Error: Index required for remove action"),
+    "batch": lambda wd, log, task, index, ops: (
+        todo_batch(wd, ops, log) if ops else "Error: Ops required for batch action"),
+}
+
+def todo(working_directory: str, action: str, audit_log: str, task: str | None = None, index: int | None = None,
+         ops: list[dict] | None = None) -> str:
     """Main todo function"""
-    if action == "list":
-        return todo_list(working_directory, audit_log)
-    elif action == "add":
-        if not task:
-            return "Error: Task required for add action"
-        return todo_add(working_directory, task, audit_log)
-    elif action == "done":
-        if not index:
-            return "Error: Index required for done action"
-        return todo_done(working_directory, index, audit_log)
-    elif action == "remove":
-        if not index:
-            return "Error: Index required for remove action"
-        return todo_remove(working_directory, index, audit_log)
-    else:
-        return f"Error: Unknown action '{action}'"
\ No newline at end of file
+    handler = _ACTIONS.get(action)
+    if handler is None:
+        return f"Error: Unknown action '{action}'"
+    return handler(working_directory, audit_log, task, index, ops)
@@ -1,33 +1,110 @@
+import hashlib
 import os
+import stat
+import threading
+from collections import OrderedDict
+from ._fileio import atomic_write
 from pydantic import BaseModel, Field, field_validator
 from pydantic_ai.tools import ToolDefinition
+from . import _sandbox
+from ._schema import check_audit_log, tool_schema
+
+# Directories write() has already created or found, so repeat writes skip makedirs
+_ENSURED_DIRS: set[str] = set()
+
+# Digest of each file's content as of the (st_mtime_ns, st_size) it was last seen at,
+# least recently used first
+FILE_DIGEST_CACHE_SIZE = 256
+_FILE_DIGESTS: OrderedDict[str, tuple[tuple[int, int], bytes]] = OrderedDict()
+_file_digests_lock = threading.Lock()  # Writes to distinct files may run in parallel threads
+
+def _cache_digest(abs_file_path: str, key: tuple[int, int], digest: bytes) -> None:
+    with _file_digests_lock:
+        _FILE_DIGESTS[abs_file_path] = (key, digest)
+        _FILE_DIGESTS.move_to_end(abs_file_path)
+        if len(_FILE_DIGESTS) > FILE_DIGEST_CACHE_SIZE:
+            _FILE_DIGESTS.popitem(last=False)
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def _unchanged(abs_file_path: str, data: bytes) -> bool:
+    """Whether abs_file_path already holds exactly data.
+
+    A size mismatch answers without reading; otherwise the file's digest is reused
+    while its mtime and size are unchanged, so only the first check reads it.
+    """
+    try:
+        st = os.stat(abs_file_path)
+    except FileNotFoundError:
+        return False
+    if not stat.S_ISREG(st.st_mode) or st.st_size != len(data):
+        return False
+    key = (st.st_mtime_ns, st.st_size)
+    with _file_digests_lock:
+        cached = _FILE_DIGESTS.get(abs_file_path)
+        if cached is not None and cached[0] == key:
+            _FILE_DIGESTS.move_to_end(abs_file_path)
+    if cached is not None and cached[0] == key:
+        return cached[1] == _digest(data)
+    with open(abs_file_path, 'rb') as f:
+        file_digest = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).digest()
+    _cache_digest(abs_file_path, key, file_digest)
+    return file_digest == _digest(data)
+
+def _ensure_dir(abs_directory: str) -> bool:
+    """Create abs_directory if needed; False if it, or a parent, exists as a file."""
+    try:
+        os.makedirs(abs_directory, exist_ok=True)
+    except (FileExistsError, NotADirectoryError):
+        return False
+    _ENSURED_DIRS.add(abs_directory)
+    return True
 
 def write(working_directory: str, path: str, content: str, audit_log: str, directory: str = "./", force: bool = False) -> str:
    try:
-       abs_working_dir = os.path.abspath(working_directory)
+       # The working directory is resolved once per process; joining onto it makes
+       # the other paths absolute with normpath alone, without a getcwd each
+       abs_working_dir = _sandbox.abs_working_dir(working_directory)
+       abs_directory = os.path.normpath(os.path.join(abs_working_dir, directory))
        
        # Handle directory path - if it's relative, make it relative to working_directory
        if not os.path.isabs(directory):
            directory = os.path.join(working_directory, directory)
        
-       abs_directory = os.path.abspath(directory)
-       if not abs_directory.startswith(abs_working_dir):
+       if not _sandbox.is_inside(abs_directory, abs_working_dir):
            return f'Error: Cannot write to directory "{directory}" as it is outside the permitted working directory'
        
-       if not os.path.exists(abs_directory):
-           os.makedirs(abs_directory)
+       if abs_directory not in _ENSURED_DIRS and not _ensure_dir(abs_directory):
+           return f"Error: Not a directory: {directory}"
        
        filepath = os.path.join(abs_directory, path)
-       abs_file_path = os.path.abspath(filepath)
-       if not abs_file_path.startswith(abs_working_dir):
+       abs_file_path = os.path.normpath(filepath)
+       if not _sandbox.is_inside(abs_file_path, abs_working_dir):
            return f'Error: Cannot write file "{filepath}" as it is outside the permitted working directory'
        
        if os.path.exists(abs_file_path) and not force:
            return f"Error: File {abs_file_path} already exists"
        
-       with open(abs_file_path, 'w' if force else 'x') as f:
-           f.write(content)
+       # Encoded once and handed to atomic_write, which writes it with os.writev on a raw
+       # descriptor: no Python file buffering, and one syscall for typical sizes
+       data = content.encode()
+       if force and _unchanged(abs_file_path, data):
+           return f"Written to {path} (unchanged)"
+       
+       try:
+           atomic_write(abs_file_path, [data], overwrite=force)
+       except FileNotFoundError:
+           if abs_directory not in _ENSURED_DIRS:
+               raise
+           # The directory was removed after it was ensured; recreate it once
+           _ENSURED_DIRS.discard(abs_directory)
+           if not _ensure_dir(abs_directory):
+               return f"Error: Not a directory: {directory}"
+           atomic_write(abs_file_path, [data], overwrite=force)
        
+       st = os.stat(abs_file_path)
+       _cache_digest(abs_file_path, (st.st_mtime_ns, st.st_size), _digest(data))
        return f"Written to {path}"
    
    except FileExistsError:
@@ -44,7 +121,7 @@ class WriteParams(BaseModel):
         description="Content to write to the file"
     )
     audit_log: str = Field(
-        description="Required: Concise summary of changes (min 10 words and max 20) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Add user authentication validation', 'Create database configuration file', 'Initialize project structure'"
+        description="Required: Concise summary of changes (max 10 words) for audit compliance. Like a git commit title - describe WHAT not WHY. Examples: 'Add user authentication validation', 'Create database configuration file', 'Initialize project structure'"
     )
     directory: str = Field(
         default="./",
@@ -58,12 +135,7 @@ class WriteParams(BaseModel):
     @field_validator('audit_log')
     @classmethod
     def validate_audit_log_length(cls, v: str) -> str:
-        words = len(v.strip().split())
-        if words > 10:
-            raise ValueError(f'Audit log must be maximum 10 words, got {words} words')
-        if not v.strip():
-            raise ValueError('Audit log cannot be empty')
-        return v
+        return check_audit_log(v)
 
 
 write_tool_definition = ToolDefinition(
@@ -78,8 +150,8 @@ Usage:
 - File paths are relative to the working directory
 
 COMPLIANCE: The audit_log parameter is REQUIRED for enterprise audit trails.
-Provide a clear, concise summary (min 10 words and max 20) describing the change being made.
+Provide a clear, concise summary (max 10 words) describing the change being made.
 Format like a git commit title: action + target + optional context.
 Examples: 'Create user configuration file', 'Add database schema definitions'""",
-    parameters_json_schema=WriteParams.model_json_schema(),
+    parameters_json_schema=tool_schema(WriteParams),
 )
\ No newline at end of file